@@ -13,19 +13,18 @@ Or make it executable:
 """
 
 import sys
-import os
 import subprocess
 import json
+import threading
 from pathlib import Path
 
 class Buoyant:
     def __init__(self):
         self.script_dir = Path(__file__).parent
         self.cli_path = self.script_dir / "cli.js"
-        
-        # Ensure cli.js is executable
-        if not os.access(self.cli_path, os.X_OK):
-            os.chmod(self.cli_path, 0o755)
+        self.server_path = self.script_dir / "cli_server.js"
+        self._server = None
+        self._lock = threading.Lock()
     
     def run(self, args=None):
         """Run the buoyant CLI with given arguments"""
@@ -34,29 +33,65 @@ class Buoyant:
         
         cmd = ["node", str(self.cli_path)] + args
         
+        # Node writes straight to our stdout/stderr, so output shows up as it's produced
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            print(result.stdout)
-            if result.stderr:
-                print(result.stderr, file=sys.stderr)
-            return result.returncode
-        except subprocess.CalledProcessError as e:
+            return subprocess.call(cmd)
+        except OSError as e:
             print(f"Error: {e}", file=sys.stderr)
             return 1
     
+    def _ensure_server(self):
+        """Start the long-lived cli_server.js worker if it isn't running"""
+        if self._server is None or self._server.poll() is not None:
+            self._server = subprocess.Popen(
+                ["node", str(self.server_path)],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+            )
+        return self._server
+    
     def get_json(self, command, *args):
         """Get JSON output from buoyant commands"""
-        cmd = ["node", str(self.cli_path), command] + list(args) + ["--json"]
+        request = json.dumps({"cmd": command, "args": list(args)}) + "\n"
         
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            return json.loads(result.stdout)
-        except subprocess.CalledProcessError as e:
-            print(f"Error: {e}", file=sys.stderr)
+        # One request in flight at a time so responses can't get interleaved
+        with self._lock:
+            try:
+                server = self._ensure_server()
+                server.stdin.write(request.encode())
+                server.stdin.flush()
+                line = server.stdout.readline()
+            except OSError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                return None
+        
+        if not line:
+            print("Error: buoyant server exited unexpectedly", file=sys.stderr)
             return None
+        
+        try:
+            response = json.loads(line)
         except json.JSONDecodeError:
             print("Failed to parse JSON response", file=sys.stderr)
             return None
+        
+        if not response.get("ok"):
+            print(f"Error: {response.get('error')}", file=sys.stderr)
+            return None
+        return response.get("data")
+    
+    def close(self):
+        """Shut down the cli_server.js worker"""
+        if self._server is not None and self._server.poll() is None:
+            self._server.stdin.close()  # the worker exits on EOF
+            self._server.wait()
+        self._server = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
     
     # Convenience methods for Python usage
     def report(self, location):
@@ -69,7 +104,7 @@ class Buoyant:
     
     def coords(self, lat, lng):
         """Get conditions for coordinates"""
-        return self.get_json("coords", "--", str(lat), str(lng))
+        return self.get_json("coords", str(lat), str(lng))
 
 def main():
     buoyant = Buoyant()
@@ -244,46 +244,16 @@ program
   .option('-r, --radius <km>', 'Search radius for data sources in km', '25')
   .action(async (location, options) => {
     try {
-      let lat, lon, locationName;
-      
       // Parse input - could be zip or "lat,lon"
-      if (/^\d{5}$/.test(location)) {
-        // It's a zip code
-        const data = await buoyant.getSeaStateByZip(location);
-        lat = data.location.lat;
-        lon = data.location.lon;
-        locationName = data.location.name || `Zip ${location}`;
-      } else if (location.includes(',')) {
-        // It's coordinates
-        [lat, lon] = location.split(',').map(s => parseFloat(s.trim()));
-        locationName = `${lat.toFixed(3)}, ${lon.toFixed(3)}`;
-      } else {
-        console.error('Use zip code (96815) or coordinates (21.3,-157.8)');
-        process.exit(1);
-      }
+      const { lat, lon, name: locationName } = await buoyant.resolveLocation(location);
       
       const searchRadius = parseFloat(options.radius);
       
       if (options.json) {
         // Get ALL the data
-        const fullReport = {
-          location: { lat, lon, name: locationName },
-          timestamp: new Date().toISOString(),
-          seaState: await buoyant.getSeaState(lat, lon),
-          sources: await buoyant.findSources(lat, lon, searchRadius),
-          tides: await buoyant.getTides(lat, lon),
-          weather: await buoyant.weather.getWeather(lat, lon),
-        };
-        
-        // Try to get spectral data from nearest buoy
-        if (fullReport.sources.buoys.length > 0) {
-          try {
-            fullReport.spectral = await buoyant.ndbc.getBuoySpectralData(fullReport.sources.buoys[0].id);
-          } catch (err) {
-            fullReport.spectral = { error: err.message };
-          }
-        }
-        
+        const fullReport = await buoyant.getReport(lat, lon, searchRadius);
+        fullReport.location.name = locationName;
+
         console.log(JSON.stringify(fullReport, null, 2));
       } else {
         // Pretty print comprehensive report
@@ -0,0 +1,65 @@
+#!/usr/bin/env node
+
+/**
+ * Long-lived worker for the Python wrapper (buoyant.py)
+ *
+ * Spawning `node cli.js` per call pays Node startup and module loading every
+ * time. Instead buoyant.py keeps this process running and talks to it over
+ * newline-delimited JSON:
+ *
+ *   stdin:  {"cmd": "report", "args": ["96815"]}
+ *   stdout: {"ok": true, "data": {...}}  or  {"ok": false, "error": "..."}
+ *
+ * The process exits when stdin is closed.
+ */
+
+const readline = require('readline');
+const Buoyant = require('./index');
+
+// stdout carries the protocol, so any client logging goes to stderr
+console.log = console.error;
+console.info = console.error;
+
+const buoyant = new Buoyant({ quiet: true });
+
+const commands = {
+  zip: (zipcode) => buoyant.getSeaStateByZip(zipcode),
+  buoy: (id) => buoyant.getBuoy(id),
+  coords: (lat, lon) => buoyant.getSeaState(parseFloat(lat), parseFloat(lon)),
+  find: (lat, lon, radius = '100') => buoyant.findSources(parseFloat(lat), parseFloat(lon), parseFloat(radius)),
+  report: async (location, radius = '25') => {
+    // Same input as `buoyant report`: a zip or "lat,lon"
+    const { lat, lon, name } = await buoyant.resolveLocation(location);
+    const report = await buoyant.getReport(lat, lon, parseFloat(radius));
+    report.location.name = name;
+    return report;
+  }
+};
+
+async function handle(line) {
+  let response;
+  try {
+    const { cmd, args = [] } = JSON.parse(line);
+    if (!commands[cmd]) {
+      throw new Error(`Unknown command: ${cmd}`);
+    }
+    response = { ok: true, data: await commands[cmd](...args) };
+  } catch (err) {
+    response = { ok: false, error: err.message };
+  }
+  // One response per line; the trailing newline is what the Python side reads up to
+  process.stdout.write(JSON.stringify(response) + '\n');
+}
+
+const rl = readline.createInterface({ input: process.stdin });
+
+// Answer requests strictly in the order they arrived
+let queue = Promise.resolve();
+rl.on('line', (line) => {
+  if (line.trim()) {
+    queue = queue.then(() => handle(line));
+  }
+});
+rl.on('close', () => {
+  queue.then(() => process.exit(0));
+});
@@ -266,7 +266,57 @@ class Buoyant {
   async getWeatherAlerts(lat, lon) {
     return await this.weather.getAlerts(lat, lon);
   }
-  
+
+  /**
+   * Resolve a report location given as a zip code or "lat,lon"
+   * @param {string} location - Zip code (96815) or coordinates (21.3,-157.8)
+   * @returns {Object} { lat, lon, name }
+   */
+  async resolveLocation(location) {
+    if (/^\d{5}$/.test(location)) {
+      const data = await this.getSeaStateByZip(location);
+      return {
+        lat: data.location.lat,
+        lon: data.location.lon,
+        name: data.location.name || `Zip ${location}`
+      };
+    }
+    if (location.includes(',')) {
+      const [lat, lon] = location.split(',').map(s => parseFloat(s.trim()));
+      return { lat, lon, name: `${lat.toFixed(3)}, ${lon.toFixed(3)}` };
+    }
+    throw new Error('Use zip code (96815) or coordinates (21.3,-157.8)');
+  }
+
+  /**
+   * Get everything available for a location in one object
+   * @param {number} lat - Latitude
+   * @param {number} lon - Longitude
+   * @param {number} radiusKm - Search radius for data sources in kilometers
+   * @returns {Object} Sea state, nearby sources, tides, weather, and spectral data from the nearest buoy
+   */
+  async getReport(lat, lon, radiusKm = 25) {
+    const report = {
+      location: { lat, lon },
+      timestamp: new Date().toISOString(),
+      seaState: await this.getSeaState(lat, lon),
+      sources: await this.findSources(lat, lon, radiusKm),
+      tides: await this.getTides(lat, lon),
+      weather: await this.weather.getWeather(lat, lon),
+    };
+
+    // Try to get spectral data from nearest buoy
+    if (report.sources.buoys.length > 0) {
+      try {
+        report.spectral = await this.ndbc.getBuoySpectralData(report.sources.buoys[0].id);
+      } catch (err) {
+        report.spectral = { error: err.message };
+      }
+    }
+
+    return report;
+  }
+
   // Private methods for data fetching with fallbacks
   async _getWaveData(lat, lon) {
     // Try NDBC first (real observations)
@@ -1,21 +1,36 @@
 import os
-import json
+import hashlib
+import orjson
+
+def transform_json_file(path):
+    # Parse, re-key by geohashCenter and write the transformed copy
+    with open(path, 'rb') as f:
+        file_data = orjson.loads(f.read())
+    # Re-key in place rather than building a second dict of the same items
+    for key in list(file_data):
+        item = file_data.pop(key)
+        file_data[item["geohashCenter"]] = item
+    transformed_filename = f"{path}_transformed.json"
+    with open(transformed_filename, 'wb') as f:
+        f.write(orjson.dumps(file_data))
+    return file_data
 
 def transform_and_load_json_files(directory):
     data = {}
-    files = [f for f in os.listdir(directory) if f.endswith('.json')]
-    for file in files:
-        with open(os.path.join(directory, file), 'r') as f:
-            file_data = json.load(f)
-        transformed_data = {item["geohashCenter"]: item for item in file_data.values()}
-        data.update(transformed_data)
-        transformed_filename = f"{file}_transformed.json"
-        with open(os.path.join(directory, transformed_filename), 'w') as f:
-            json.dump(transformed_data, f)
+    with os.scandir(directory) as it:
+        paths = [entry.path for entry in it if entry.is_file() and entry.name.endswith('.json')]
+    for path in paths:
+        data.update(transform_json_file(path))
     return data
 
+def canon_hash(value):
+    # Digest of everything but the geohashCenter, with sorted keys so key order doesn't matter
+    value_no_geohash = {k: v for k, v in value.items() if k != 'geohashCenter'}
+    return hashlib.blake2b(orjson.dumps(value_no_geohash, option=orjson.OPT_SORT_KEYS), digest_size=16).digest()
+
 def find_duplicates(data):
     unique_data = {}
+    unique_hashes = {}  # canon_hash of unique_data entries, filled in on their first collision
     duplicates = []
     geohash_only_duplicates = []
     geohash_property_mismatches = []
@@ -29,9 +44,9 @@ def find_duplicates(data):
                 duplicates.append(value)
             else:
                 # Check for geohash only duplicate
-                value_no_geohash = {k: v for k, v in value.items() if k != 'geohashCenter'}
-                unique_no_geohash = {k: v for k, v in unique_data[geohash].items() if k != 'geohashCenter'}
-                if value_no_geohash == unique_no_geohash:
+                if geohash not in unique_hashes:
+                    unique_hashes[geohash] = canon_hash(unique_data[geohash])
+                if canon_hash(value) == unique_hashes[geohash]:
                     geohash_only_duplicates.append(value)
                 else:
                     geohash_property_mismatches.append(value)
@@ -50,7 +65,7 @@ directory = 'jsonmerge'  # replace with the actual directory path
 data = transform_and_load_json_files(directory)
 unique_data, duplicates, geohash_only_duplicates, geohash_property_mismatches = find_duplicates(data)
 
-with open(os.path.join(directory, 'nwsStations.json'), 'w') as f:
-    json.dump(unique_data, f, indent=4)
+with open(os.path.join(directory, 'nwsStations.json'), 'wb') as f:
+    f.write(orjson.dumps(unique_data, option=orjson.OPT_INDENT_2))
 
 write_report(len(data), duplicates, geohash_only_duplicates, geohash_property_mismatches, os.path.join(directory, 'report.txt'))
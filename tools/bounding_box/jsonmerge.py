@@ -1,16 +1,24 @@
 import os
-import json
+import hashlib
+import orjson
 
 def load_json_files(directory):
     data = {}
-    files = [f for f in os.listdir(directory) if f.endswith('.json')]
-    for file in files:
-        with open(os.path.join(directory, file), 'r') as f:
-            data.update(json.load(f))
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.endswith('.json'):
+                with open(entry.path, 'rb') as f:
+                    data.update(orjson.loads(f.read()))
     return data
 
+def canon_hash(value):
+    # Digest of everything but the geohashCenter, with sorted keys so key order doesn't matter
+    value_no_geohash = {k: v for k, v in value.items() if k != 'geohashCenter'}
+    return hashlib.blake2b(orjson.dumps(value_no_geohash, option=orjson.OPT_SORT_KEYS), digest_size=16).digest()
+
 def find_duplicates(data):
     unique_data = {}
+    unique_hashes = {}  # canon_hash of unique_data entries, filled in on their first collision
     duplicates = []
     geohash_only_duplicates = []
     geohash_property_mismatches = []
@@ -24,9 +32,9 @@ def find_duplicates(data):
                 duplicates.append(value)
             else:
                 # Check for geohash only duplicate
-                value_no_geohash = {k: v for k, v in value.items() if k != 'geohashCenter'}
-                unique_no_geohash = {k: v for k, v in unique_data[geohash].items() if k != 'geohashCenter'}
-                if value_no_geohash == unique_no_geohash:
+                if geohash not in unique_hashes:
+                    unique_hashes[geohash] = canon_hash(unique_data[geohash])
+                if canon_hash(value) == unique_hashes[geohash]:
                     geohash_only_duplicates.append(value)
                 else:
                     geohash_property_mismatches.append(value)
@@ -47,8 +55,8 @@ data = load_json_files('jsonmerge')
 unique_data, duplicates, geohash_only_duplicates, geohash_property_mismatches = find_duplicates(data)
 
 # Write unique data to new file
-with open('jsonmerge/nwsStations.json', 'w') as f:
-    json.dump(unique_data, f, indent=4)
+with open('jsonmerge/nwsStations.json', 'wb') as f:
+    f.write(orjson.dumps(unique_data, option=orjson.OPT_INDENT_2))
 
 # Write report
 write_report(len(data), duplicates, geohash_only_duplicates, geohash_property_mismatches, 'jsonmerge/report.txt')
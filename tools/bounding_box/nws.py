@@ -0,0 +1,148 @@
+"""
+Shared plumbing for the scripts that talk to api.weather.gov.
+
+Every script in this folder hammers the same host, so they all go through one
+pooled session instead of opening a fresh TCP+TLS connection per request.
+Gridpoint payloads only change about once an hour, so responses are cached on
+disk and a re-run over the same (or an overlapping) area doesn't hit the network.
+"""
+import asyncio
+import atexit
+import logging
+import os
+import pickle
+from pathlib import Path
+import aiohttp
+import orjson
+from aiohttp_client_cache import CachedSession, SQLiteBackend
+from aiolimiter import AsyncLimiter
+
+# BUOYANT_DEBUG=1 turns on the per-gridpoint debug logging in the scripts that import this module
+if os.environ.get("BUOYANT_DEBUG") == "1":
+    logging.basicConfig(level=logging.DEBUG)
+
+USER_AGENT = {'User-Agent': 'email@example.com', 'Accept': 'application/geo+json'}
+
+# api.weather.gov is happy with ~5 concurrent requests; anything more starts drawing 429s
+MAX_CONCURRENT_REQUESTS = 5
+
+# 3 s to connect, 10 s between reads
+TIMEOUT = aiohttp.ClientTimeout(sock_connect=3, sock_read=10)
+
+# Transient failures are retried up to MAX_RETRIES times, waiting BACKOFF_FACTOR * 2**attempt seconds in between
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 5
+BACKOFF_FACTOR = 0.5
+
+# Seconds a cached response is kept (this takes precedence over NWS's own Cache-Control max-age)
+CACHE_EXPIRE_AFTER = 3600
+
+# /points/{lat},{lon} -> (gridId, gridX, gridY) never changes in practice, so it is kept across runs
+POINTS_CACHE_PATH = Path.home() / ".cache" / "buoyant" / "points.pkl"
+
+
+def _load_points():
+    try:
+        with open(POINTS_CACHE_PATH, "rb") as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return {}
+
+
+_points = _load_points()
+_points_loaded = len(_points)
+
+
+@atexit.register
+def _save_points():
+    if len(_points) == _points_loaded:
+        return
+    POINTS_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(POINTS_CACHE_PATH, "wb") as f:
+        pickle.dump(_points, f)
+
+
+async def resolve_point_async(session, sem, limiter, lat, lon):
+    # Forecast grid for a location. NWS grid squares are ~2.5 km, so coordinates are rounded to
+    # 3 decimals (~111 m) and nearby lookups share one request. Raises on a failed request.
+    key = (round(lat, 3), round(lon, 3))
+    if key not in _points:
+        properties = (await fetch_json(session, sem, limiter, f"https://api.weather.gov/points/{key[0]},{key[1]}"))["properties"]
+        _points[key] = (properties.get("gridId"), properties.get("gridX"), properties.get("gridY"))
+    return _points[key]
+
+
+def resolve_point(lat, lon):
+    # resolve_point_async for the scripts that only look up one location
+    async def main():
+        async with gridpoint_session() as session:
+            sem, limiter = throttle()
+            return await resolve_point_async(session, sem, limiter, lat, lon)
+    return asyncio.run(main())
+
+
+def first_value(properties, layer):
+    # First (current) value of a gridpoint layer, or None if the layer is missing or empty
+    layer_data = properties.get(layer)
+    if not layer_data:
+        return None
+    values = layer_data.get('values')
+    return values[0].get('value') if values else None
+
+
+def cached_client_session(**kwargs):
+    # The one on-disk response cache every script shares, keyed by the full URL, so
+    # /gridpoints/{gridId}/{x},{y} is keyed by (gridId, x, y)
+    cache = SQLiteBackend("nws_async_cache", expire_after=CACHE_EXPIRE_AFTER,
+                          allowed_methods=("GET",), cache_control=True)
+    return CachedSession(cache=cache, headers=USER_AGENT, timeout=TIMEOUT, **kwargs)
+
+
+def gridpoint_session():
+    # One session for every request so the TCP/TLS connection is reused
+    connector = aiohttp.TCPConnector(limit_per_host=MAX_CONCURRENT_REQUESTS, keepalive_timeout=60)
+    return cached_client_session(connector=connector)
+
+
+def throttle():
+    # Semaphore and limiter keeping requests to MAX_CONCURRENT_REQUESTS in flight and per second
+    return asyncio.Semaphore(MAX_CONCURRENT_REQUESTS), AsyncLimiter(MAX_CONCURRENT_REQUESTS, 1)
+
+
+async def fetch_json(session, sem, limiter, url):
+    # Parsed body of a GET. A fresh cached copy is returned without going through sem and limiter;
+    # session.cache.has_url() can't be used for that since it also counts expired entries.
+    cached = await session.cache.get_response(session.cache.create_key("GET", url))
+    if cached is not None:
+        cached.raise_for_status()
+        return orjson.loads(await cached.read())
+    # Anything else goes to the network, retrying 429/5xx and dropped connections with backoff
+    for attempt in range(MAX_RETRIES + 1):
+        last_attempt = attempt == MAX_RETRIES
+        try:
+            async with sem, limiter, session.get(url) as response:
+                if last_attempt or response.status not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return orjson.loads(await response.read())
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if last_attempt:
+                raise
+        await asyncio.sleep(BACKOFF_FACTOR * 2 ** attempt)
+
+
+async def fetch_gridpoint(session, sem, limiter, grid_id, grid_x, grid_y):
+    return await fetch_json(session, sem, limiter, f"https://api.weather.gov/gridpoints/{grid_id}/{grid_x},{grid_y}")
+
+
+async def fetch_gridpoints(session, grid_id, cells):
+    # Returns one parsed response (or the exception it raised) per (gridX, gridY) in cells, in order
+    sem, limiter = throttle()
+    tasks = [fetch_gridpoint(session, sem, limiter, grid_id, grid_x, grid_y) for grid_x, grid_y in cells]
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def get_gridpoints(grid_id, cells):
+    async def main():
+        async with gridpoint_session() as session:
+            return await fetch_gridpoints(session, grid_id, cells)
+    return asyncio.run(main())
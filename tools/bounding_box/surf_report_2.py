@@ -1,19 +1,16 @@
-import time
-import random
-import requests
-import json
+import logging
 import math
+from nws import first_value, get_gridpoints, resolve_point
 
-user_agent = {'User-Agent': 'email@example.com', 'Accept': 'application/geo+json'}
+DATA_POINTS = ('wavePeriod', 'waveDirection', 'primarySwellHeight', 'primarySwellDirection', 'secondarySwellHeight',
+               'secondarySwellDirection', 'windSpeed', 'windDirection', 'windWaveHeight', 'temperature', 'waveHeight')
+
+log = logging.getLogger(__name__)
 
 def get_wave_data():
     lat = 21.2854
     lon = -157.8357
-    response = requests.get(f"https://api.weather.gov/points/{lat},{lon}", headers=user_agent)
-    response_json = json.loads(response.text)
-
-    origin_grid_x, origin_grid_y = response_json['properties']['gridX'], response_json['properties']['gridY']
-    grid_id = response_json['properties']['gridId']
+    grid_id, origin_grid_x, origin_grid_y = resolve_point(lat, lon)
 
     max_search_radius = 2  # Approx 5 km
     search_radius = 1
@@ -21,36 +18,35 @@ def get_wave_data():
     wave_data = {}  # Dictionary to store nearest wave data for each data point
 
     while search_radius <= max_search_radius:
-        for x in range(origin_grid_x - search_radius, origin_grid_x + search_radius + 1):
-            for y in range(origin_grid_y - search_radius, origin_grid_y + search_radius + 1):
-                if abs(origin_grid_x - x) <= search_radius and abs(origin_grid_y - y) <= search_radius:
-                    # Adding delay with some jitter
-                    time.sleep(1 + random.uniform(-0.5, 0.5))
+        # Fetch the whole square at once; cells already fetched for a smaller radius come from the cache
+        cells = [(x, y)
+                 for x in range(origin_grid_x - search_radius, origin_grid_x + search_radius + 1)
+                 for y in range(origin_grid_y - search_radius, origin_grid_y + search_radius + 1)]
+        results = get_gridpoints(grid_id, cells)
 
-                    grid_response = requests.get(f"https://api.weather.gov/gridpoints/{grid_id}/{x},{y}", headers=user_agent)
-                    grid_response_json = json.loads(grid_response.text)
+        for (x, y), grid_response_json in zip(cells, results):
+            # Calculate distance from origin grid point
+            distance = math.hypot(origin_grid_x - x, origin_grid_y - y)
+            grid_points_checked.append({'gridX': x, 'gridY': y, 'distance': distance})
+            log.debug("Checked grid point (%s,%s) with distance %s from origin.", x, y, distance)
 
-                    # Calculate distance from origin grid point
-                    distance = math.sqrt((origin_grid_x - x) ** 2 + (origin_grid_y - y) ** 2)
-                    grid_points_checked.append({'gridX': x, 'gridY': y, 'distance': distance})
-                    print(f"Checked grid point ({x},{y}) with distance {distance} from origin.")
+            if isinstance(grid_response_json, Exception):
+                log.warning("Failed to get data for grid point (%s,%s): %s", x, y, grid_response_json)
+                continue
 
-                    if 'properties' in grid_response_json:
-                        properties = grid_response_json['properties']
-                        for data_point in ['wavePeriod', 'waveDirection', 'primarySwellHeight',
-                                           'primarySwellDirection', 'secondarySwellHeight',
-                                           'secondarySwellDirection', 'windSpeed', 'windDirection',
-                                           'windWaveHeight', 'temperature', 'waveHeight']:
-                            if data_point in properties:
-                                values = properties[data_point]['values']
-                                if values and values[0]['value'] is not None:
-                                    if data_point not in wave_data or distance < wave_data[data_point]['distance']:
-                                        wave_data[data_point] = {
-                                            'value': values[0]['value'],
-                                            'location': {'lat': lat, 'lon': lon},
-                                            'grid_point': {'gridX': x, 'gridY': y},
-                                            'distance': distance
-                                        }
+            properties = grid_response_json.get('properties') or {}
+            for data_point in DATA_POINTS:
+                value = first_value(properties, data_point)
+                if value is None:
+                    continue
+                nearest = wave_data.get(data_point)
+                if nearest is None or distance < nearest['distance']:
+                    wave_data[data_point] = {
+                        'value': value,
+                        'location': {'lat': lat, 'lon': lon},
+                        'grid_point': {'gridX': x, 'gridY': y},
+                        'distance': distance
+                    }
 
         search_radius += 1
 
@@ -1,24 +1,26 @@
 #transform the json output from boundingbox.py to directly look up an object in the JSON file by its geohashCenter value. It's more efficient than having to search through the entire list of objects for a particular geohashCenter. Bad initial design of that function on my part.
 
-import json
+import orjson
 import os
 
 # replace with actual filename
 filename = "87y.json"
 
 # load the data from existing JSON file
-with open(filename, 'r') as f:
-    data = json.load(f)
+with open(filename, 'rb') as f:
+    data = orjson.loads(f.read())
 
-# transform the data to be keyed by 'geohashCenter' value
-transformed_data = {item["geohashCenter"]: item for item in data.values()}
+# transform the data to be keyed by 'geohashCenter' value, re-keying in place so we never hold two copies
+for key in list(data):
+    item = data.pop(key)
+    data[item["geohashCenter"]] = item
 
 # create a new filename by appending '_transformed.json' to the original filename
 base, ext = os.path.splitext(filename)
 transformed_filename = f"{base}_transformed{ext}"
 
 # write the transformed data to the new JSON file
-with open(transformed_filename, 'w') as f:
-    json.dump(transformed_data, f)
+with open(transformed_filename, 'wb') as f:
+    f.write(orjson.dumps(data))
 
 print(f"Transformed data written to {transformed_filename}")
@@ -1,45 +1,56 @@
-import time
-import random
-import requests
-import json
+import asyncio
+import logging
 import math
+from nws import fetch_gridpoints, gridpoint_session, resolve_point
 
-user_agent = {'User-Agent': 'email@example.com', 'Accept': 'application/geo+json'}
+log = logging.getLogger(__name__)
 
-def get_wave_height():
-    lat = 21.2854
-    lon = -157.8357
-    response = requests.get(f"https://api.weather.gov/points/{lat},{lon}", headers=user_agent)
-    response_json = json.loads(response.text)
-    
-    origin_grid_x, origin_grid_y = response_json['properties']['gridX'], response_json['properties']['gridY']
-    grid_id = response_json['properties']['gridId']
-    
-    max_search_radius = 2  # Approx 100 km
-    search_radius = 1
+def ring(origin_grid_x, origin_grid_y, radius):
+    # Grid points exactly `radius` squares out from the origin, nearest first
+    cells = [(origin_grid_x + dx, origin_grid_y + dy)
+             for dx in range(-radius, radius + 1)
+             for dy in range(-radius, radius + 1)
+             if max(abs(dx), abs(dy)) == radius]
+    return sorted(cells, key=lambda cell: math.hypot(cell[0] - origin_grid_x, cell[1] - origin_grid_y))
+
+async def search_rings(grid_id, origin_grid_x, origin_grid_y, max_search_radius):
     grid_points_checked = []  # List to store grid points checked
 
-    while search_radius <= max_search_radius:
-        for x in range(origin_grid_x - search_radius, origin_grid_x + search_radius + 1):
-            for y in range(origin_grid_y - search_radius, origin_grid_y + search_radius + 1):
-                # Adding delay with some jitter
-                time.sleep(1 + random.uniform(-0.5, 0.5))
-                
-                grid_response = requests.get(f"https://api.weather.gov/gridpoints/{grid_id}/{x},{y}", headers=user_agent)
-                grid_response_json = json.loads(grid_response.text)
-                
+    async with gridpoint_session() as session:
+        # Fetch a whole ring at once and stop at the first ring that has a wave height
+        for search_radius in range(max_search_radius + 1):
+            cells = ring(origin_grid_x, origin_grid_y, search_radius)
+            results = await fetch_gridpoints(session, grid_id, cells)
+
+            for (x, y), grid_response_json in zip(cells, results):
                 # Calculate distance from origin grid point
-                distance = math.sqrt((origin_grid_x - x)**2 + (origin_grid_y - y)**2)
+                distance = math.hypot(origin_grid_x - x, origin_grid_y - y)
                 grid_points_checked.append({'gridX': x, 'gridY': y, 'distance': distance})
-                print(f"Checked grid point ({x},{y}) with distance {distance} from origin.")
-                
+                log.debug("Checked grid point (%s,%s) with distance %s from origin.", x, y, distance)
+
+                if isinstance(grid_response_json, Exception):
+                    log.warning("Failed to get data for grid point (%s,%s): %s", x, y, grid_response_json)
+                    continue
+
                 if 'waveHeight' in grid_response_json['properties']:
                     wave_height_values = grid_response_json['properties']['waveHeight']['values']
                     if wave_height_values and wave_height_values[0]['value'] is not None:
-                        return wave_height_values[0]['value'], {'lat': lat, 'lon': lon}, {'gridX': x, 'gridY': y}, grid_points_checked
-        
-        search_radius += 1
+                        return wave_height_values[0]['value'], {'gridX': x, 'gridY': y}, grid_points_checked
+
+    return None, None, grid_points_checked
+
+def get_wave_height():
+    lat = 21.2854
+    lon = -157.8357
+    grid_id, origin_grid_x, origin_grid_y = resolve_point(lat, lon)
     
+    max_search_radius = 2  # Approx 5 km
+
+    wave_height, grid_point, grid_points_checked = asyncio.run(
+        search_rings(grid_id, origin_grid_x, origin_grid_y, max_search_radius))
+    if wave_height is not None:
+        return wave_height, {'lat': lat, 'lon': lon}, grid_point, grid_points_checked
+
     return None, None, None, grid_points_checked  # Return None if no wave height was found within the maximum search radius
 
 wave_height, location, grid_point, grid_points_checked = get_wave_height()
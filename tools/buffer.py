@@ -1,5 +1,6 @@
 import shapely.geometry
 import json
+import orjson
 from shapely.geometry import shape
 
 # Load the US polygon
@@ -30,5 +31,5 @@ us_outline_feature_collection = {
 }
 
 # Save the result
-with open('thickUSOutline.geojson', 'w') as f:
-    json.dump(us_outline_feature_collection, f)
+with open('thickUSOutline.geojson', 'wb') as f:
+    f.write(orjson.dumps(us_outline_feature_collection))
@@ -0,0 +1,43 @@
+"""
+Geohash helpers shared by the scripts in tools/: the base32 alphabet, and vectorized
+encoding for the scripts that geohash many points at once (ndbcBuoys.py and
+bounding_box/boundingbox.py).
+
+encode_geohashes gives the same strings as python-geohash's encode, but for whole
+arrays of coordinates in one numpy pass instead of one Python call per point.
+"""
+import numpy as np
+
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+# The same alphabet as bytes, so a whole array of 5-bit codes maps to characters in one indexing step
+_BASE32_BYTES = np.frombuffer(GEOHASH_BASE32.encode("ascii"), dtype=np.uint8)
+
+
+def _spread_bits(x):
+    # Morton-code spread: bit i of a (<= 32 bit) integer moves to bit 2i
+    x = (x | (x << np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    x = (x | (x << np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+    x = (x | (x << np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    x = (x | (x << np.uint64(2))) & np.uint64(0x3333333333333333)
+    x = (x | (x << np.uint64(1))) & np.uint64(0x5555555555555555)
+    return x
+
+
+def _quantize(values, low, high, bits):
+    # Index of the 2**bits bucket each value falls in between low and high
+    scaled = np.floor((np.asarray(values, dtype=np.float64) - low) / (high - low) * (1 << bits))
+    return np.clip(scaled, 0, (1 << bits) - 1).astype(np.uint64)
+
+
+def encode_geohashes(lats, lons, precision):
+    # Geohash every (lat, lon) pair in one pass; longitude takes the first (and any extra) bit
+    bits = 5 * precision
+    lat_code = _spread_bits(_quantize(lats, -90, 90, bits // 2))
+    lon_code = _spread_bits(_quantize(lons, -180, 180, bits - bits // 2))
+    if bits % 2:
+        code = lon_code | (lat_code << np.uint64(1))
+    else:
+        code = (lon_code << np.uint64(1)) | lat_code
+    shifts = np.arange(5 * (precision - 1), -1, -5, dtype=np.uint64)
+    chars = _BASE32_BYTES[(code[:, None] >> shifts) & np.uint64(31)]
+    return np.ascontiguousarray(chars).view(f"S{precision}").ravel().astype(f"U{precision}").tolist()
@@ -1,19 +1,72 @@
+from itertools import product
+import shapely
 import shapely.geometry
-from shapely.geometry import shape
-from shapely.ops import unary_union
 import json
+import geohash
+import numpy as np
+import pyogrio.raw
+from geohash_batch import GEOHASH_BASE32
+
+
+def first_feature_geometry(path):
+    # Only the first feature is used. GDAL reads it straight into WKB, so no Python object is built per
+    # coordinate; the same call reads a FlatGeobuf (.fgb) conversion of the file unchanged.
+    _, _, geometry, _ = pyogrio.raw.read(path, max_features=1, columns=[])
+    return shapely.from_wkb(geometry[0])
+
+
+COAST_GEOHASH_PRECISION = 5
+
+
+def geohash_covering(geometry, precision):
+    # Sorted geohashes of every cell at `precision` that touches geometry. Cells are refined one level
+    # at a time and only the children of cells on the edge of geometry are tested, never the whole
+    # 32**precision grid; a cell entirely inside it has all of its children in the covering.
+    shapely.prepare(geometry)
+    covering = []
+    prefixes = ['']
+    for level in range(1, precision + 1):
+        candidates = [prefix + c for prefix in prefixes for c in GEOHASH_BASE32]
+        if not candidates:
+            break
+        bounds = np.array([[b['w'], b['s'], b['e'], b['n']] for b in map(geohash.bbox, candidates)])
+        boxes = shapely.box(*bounds.T)
+        touching = np.flatnonzero(shapely.intersects(geometry, boxes))
+        inside = touching[shapely.contains(geometry, boxes[touching])]
+        covering += [candidates[i] + ''.join(suffix)
+                     for i in inside for suffix in product(GEOHASH_BASE32, repeat=precision - level)]
+        prefixes = [candidates[i] for i in np.setdiff1d(touching, inside)]
+    return sorted(covering + prefixes)
+
+
+def valid_polygon(geometry):
+    # Fix self-intersections etc. once up front. make_valid can turn a broken polygon into a
+    # GeometryCollection with stray lines or points, so only the polygon parts are kept.
+    geometry = shapely.make_valid(geometry)
+    if geometry.geom_type == 'GeometryCollection':
+        parts = shapely.get_parts(shapely.get_parts(geometry))
+        geometry = shapely.multipolygons(parts[shapely.get_type_id(parts) == shapely.GeometryType.POLYGON])
+    return geometry
+
 
 # Load the US polygon and the world coast polygon
-with open('usPolygon.geojson') as f:
-    us_data = json.load(f)
-us_polygon = shape(us_data['features'][0]['geometry'])
+us_polygon = valid_polygon(first_feature_geometry('usPolygon.geojson'))
+world_coast_polygon = valid_polygon(first_feature_geometry('worldCoastPolygon.geojson'))
+print(f"US polygon: {us_polygon.geom_type}, world coast polygon: {world_coast_polygon.geom_type}")
 
-with open('worldCoastPolygon.geojson') as f:
-    world_coast_data = json.load(f)
-world_coast_polygon = shape(world_coast_data['features'][0]['geometry'])
+# Drop sub-500 m detail (0.005 degrees) before the overlay; it disappears under the 5 km buffer anyway
+us_polygon = shapely.simplify(us_polygon, 0.005)
+world_coast_polygon = shapely.simplify(world_coast_polygon, 0.005)
+
+# Nothing outside the US bounding box can end up in the intersection, so cut it away with a cheap rectangle clip
+world_coast_polygon = shapely.clip_by_rect(world_coast_polygon, *us_polygon.bounds)
+
+# Build the GEOS spatial index for both polygons up front so the overlay below can reuse it
+shapely.prepare(us_polygon)
+shapely.prepare(world_coast_polygon)
 
 # Compute the intersection of the US polygon and the world coast polygon
-us_coast = us_polygon.intersection(world_coast_polygon)
+us_coast = shapely.intersection(us_polygon, world_coast_polygon)
 
 # Convert the intersection result back to geojson
 us_coast_geojson = json.dumps(shapely.geometry.mapping(us_coast))
@@ -24,11 +77,14 @@ with open('usCoast.geojson', 'w') as f:
 
 # Now create a buffered version
 buffer_distance_degrees = 5 / 111.325  # Approximate conversion from km to degrees
-buffered_us_coast = us_coast.buffer(buffer_distance_degrees)
+# 4 segments per quarter circle is plenty for a coarse 5 km buffer and keeps the vertex count down.
+buffered_us_coast = shapely.buffer(us_coast, buffer_distance_degrees, quad_segs=4)
 
-# Convert the buffered result back to geojson
-buffered_us_coast_geojson = json.dumps(shapely.geometry.mapping(unary_union(buffered_us_coast)))
+# Instead of the buffered polygon itself, save the geohash-5 cells that touch it. Every point within the
+# 5 km buffer falls in one of them, so "is this buoy near the coast?" is buoy_geohash[:5] in that set, with
+# no geometry involved. Cells are ~4.9 x 4.9 km, so a match can also be up to a cell further out.
+coast_geohashes = geohash_covering(buffered_us_coast, COAST_GEOHASH_PRECISION)
 
-# Save the result
-with open('bufferedUsCoast.geojson', 'w') as f:
-    f.write(buffered_us_coast_geojson)
+# Save the result, one prefix per line
+with open('coast_geohashes.txt', 'w') as f:
+    f.writelines(f"{prefix}\n" for prefix in coast_geohashes)
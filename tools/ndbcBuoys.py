@@ -1,84 +1,183 @@
+import gzip
+import os
+import zlib
 import requests
-from bs4 import BeautifulSoup
-import json
-import geohash2
+import requests_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+import orjson
+import geohash as gh
+import threading
 import time
 import re
+from xml.etree import ElementTree
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from geohash_batch import encode_geohashes
 ##this script gets ndbc buoy data from NOAA's website
 
+ACTIVE_STATIONS_URL = 'https://www.ndbc.noaa.gov/activestations.xml'
+
+HEADERS = {"User-Agent": "buoyant/1.0 (contact: email@example.com)"}
+
+# Station id/name/position almost never change, so pages are cached on disk for 30 days
+# (or for as long as NOAA's own Cache-Control says)
+CACHE_EXPIRE_AFTER = 86400 * 30
+
+MAX_WORKERS = 8
+REQUESTS_PER_SECOND = 1  # across all workers, to stay polite to NOAA
+
+# One pooled, cached session for every station page so the TLS connection is reused
+SESSION = requests_cache.CachedSession('ndbc_cache.sqlite', expire_after=CACHE_EXPIRE_AFTER, cache_control=True)
+SESSION.headers.update(HEADERS)
+# Retry transient gateway errors with backoff; raise_on_status=False hands the last response back to raise_for_status
+adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=Retry(
+    total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504], raise_on_status=False))
+SESSION.mount('https://', adapter)
+
+class RateLimiter:
+    # Spaces calls from any number of threads at least 1/rate seconds apart
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        # Claim the next free slot under the lock, then sleep until it comes up without holding the lock
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        time.sleep(slot - now)
+
+RATE_LIMITER = RateLimiter(REQUESTS_PER_SECOND)
+
+# The station page script block defines the station as JS constants; the name is optional and may contain quotes
+PAT = re.compile(r"const currentstnid = '(?P<id>[^']+)';"
+                 r"(?:.*?const currentstnname = '(?P<name>[^\n]*)';)?"
+                 r".*?const currentstnlat = '(?P<lat>[^']+)';"
+                 r".*?const currentstnlng = '(?P<lng>[^']+)';", re.S)
+
 def get_station_ids(filename):
     with open(filename, 'r') as f:
         return [line.strip() for line in f.readlines()]
 
-def parse_buoy_data(station_id):
+def buoy_record(id, name, latitude, longitude, geohash=None):
+    return {
+        'id': id,
+        'name': name,
+        'latitude': latitude,
+        'longitude': longitude,
+        'geohash': geohash if geohash is not None else gh.encode(float(latitude), float(longitude), precision=12)
+    }
+
+def _is_fresh(session, url):
+    # True if a GET of url would be answered from the cache. cache.contains() can't be used for
+    # this since it also counts expired entries, which session.get() refetches from the network.
+    cached = session.cache.get_response(session.cache.create_key(requests.Request('GET', url), verify=True))
+    return cached is not None and not cached.is_expired
+
+def get_active_stations(session):
+    # Every active station in one request, as {lowercase id: <station> attributes}.
+    # Empty if the list can't be fetched, in which case every station page is scraped instead.
+    try:
+        if not _is_fresh(session, ACTIVE_STATIONS_URL):
+            RATE_LIMITER.wait()
+        r = session.get(ACTIVE_STATIONS_URL, timeout=30)
+        r.raise_for_status()
+        root = ElementTree.fromstring(r.content)
+    except (requests.exceptions.RequestException, ElementTree.ParseError) as e:
+        print(f"Failed to retrieve the active station list: {str(e)}")
+        return {}
+    return {station.get('id').lower(): station.attrib for station in root.iter('station')}
+
+def parse_buoy_data(session, station_id):
     url = f'https://www.ndbc.noaa.gov/station_page.php?station={station_id}'
-    headers = {"contact email: email@example.com"}
 
     try:
-        r = requests.get(url, headers=headers, timeout=10)  # Increase the timeout value as needed
+        # Cache hits don't touch the network, so they skip the rate limit
+        if not _is_fresh(session, url):
+            RATE_LIMITER.wait()
+        r = session.get(url, timeout=10)  # Increase the timeout value as needed
         r.raise_for_status()
     except requests.exceptions.RequestException as e:
         print(f"Failed to retrieve data for station {station_id}: {str(e)}")
         return None, station_id
 
-    soup = BeautifulSoup(r.text, 'html.parser')
-
-    # Check if the page title indicates that the station was not found
-    if "Station not found" in soup.title.string:
+    # Check if the page indicates that the station was not found
+    if "Station not found" in r.text:
         print(f"Station {station_id} not found.")
         return None, station_id
 
-    script_tag = soup.find(string=re.compile('const currentstnid'))
-
-    if script_tag is None:
-        print(f"Unable to find script tag for station {station_id}.")
-        return None, station_id
+    match = PAT.search(r.text)
 
-    script_content = script_tag.string
-
-    id_match = re.search(r"const currentstnid = '(.+?)';", script_content)
-    name_match = re.search(r"const currentstnname = '(.*)';", script_content)
-    lat_match = re.search(r"const currentstnlat = '(.+?)';", script_content)
-    lng_match = re.search(r"const currentstnlng = '(.+?)';", script_content)
-
-    if id_match and lat_match and lng_match:
-        id = id_match.group(1)
-        name = name_match.group(1) if name_match else f"Station {station_id}"
-        latitude = lat_match.group(1)
-        longitude = lng_match.group(1)
-
-        return {
-            'id': id,
-            'name': name,
-            'latitude': latitude,
-            'longitude': longitude,
-            'geohash': geohash2.encode(float(latitude), float(longitude))
-        }, None
+    if match:
+        name = match['name'] if match['name'] is not None else f"Station {station_id}"
+        return buoy_record(match['id'], name, match['lat'], match['lng']), None
     else:
         print(f"Failed to extract information for station {station_id}.")
         return None, station_id
 
-def write_buoys_to_file(station_ids, filename):
-    buoys = []
-    skipped_ids = []
-
-    for station_id in station_ids:
-        buoy_data, skipped_id = parse_buoy_data(station_id)
-
-        if buoy_data is not None:
-            buoys.append(buoy_data)
-        if skipped_id is not None:
-            skipped_ids.append(skipped_id)
-
-        # Wait for 1 second before the next request
-        time.sleep(3)
-
-    with open(filename, 'w') as f:
-        json.dump(buoys, f, indent=4)  # Add indentation for better readability
+def load_done_ids(filename):
+    # Station ids already written to the gzipped filename by an earlier run. Each run appends a new
+    # gzip member; a crash leaves the last one unfinished, so the file is rewritten from the lines
+    # that can still be read and new members aren't appended after a broken one.
+    lines = []
+    try:
+        with gzip.open(filename, 'rb') as f:
+            for line in f:
+                lines.append(line)
+        damaged = bool(lines) and not lines[-1].endswith(b'\n')
+    except FileNotFoundError:
+        return set()
+    except (EOFError, gzip.BadGzipFile, zlib.error):
+        damaged = True
+    if damaged:
+        if lines and not lines[-1].endswith(b'\n'):
+            lines.pop()
+        with gzip.open(filename, 'wb') as f:
+            f.writelines(lines)
+    # Station pages report ids in lowercase, the station list may not
+    return {orjson.loads(line)['id'].lower() for line in lines}
 
-    with open('skipped_buoy.txt', 'w') as f:
-        for sid in skipped_ids:
-            f.write(f"{sid}\n")
+def write_buoys_to_file(station_ids, filename):
+    # Resume: stations fetched by a previous run are already in filename
+    done = load_done_ids(filename)
+    station_ids = [station_id for station_id in station_ids if station_id.lower() not in done]
+
+    # Most stations are in NDBC's active station list; only the rest need their station page scraped
+    active_stations = get_active_stations(SESSION)
+    listed_ids = [station_id for station_id in station_ids if station_id.lower() in active_stations]
+    unlisted_ids = [station_id for station_id in station_ids if station_id.lower() not in active_stations]
+    print(f"{len(done)} stations already fetched, {len(listed_ids)} in the active station list, "
+          f"{len(unlisted_ids)} to scrape.")
+
+    with gzip.open(filename, 'ab', compresslevel=6) as f, open('skipped_buoy.txt', 'w') as skipped:
+        # Listed stations are all known up front, so their geohashes are computed in one batch
+        stations = [active_stations[station_id.lower()] for station_id in listed_ids]
+        geohashes = encode_geohashes([float(station['lat']) for station in stations],
+                                     [float(station['lon']) for station in stations], 12)
+        for station, geohash in zip(stations, geohashes):
+            # The list keeps NDBC's casing (e.g. "46B01"); station pages give ids in lowercase
+            f.write(orjson.dumps(buoy_record(station['id'].lower(), station['name'], station['lat'], station['lon'], geohash),
+                                 option=orjson.OPT_APPEND_NEWLINE))
+        f.flush()
+        os.fsync(f.fileno())
+
+        # Fetch the remaining stations on a pool of threads sharing one session; RATE_LIMITER paces the requests.
+        # Every buoy and skipped id is written and synced as it comes in, so a crash loses nothing.
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = [executor.submit(parse_buoy_data, SESSION, station_id) for station_id in unlisted_ids]
+            for future in as_completed(futures):
+                buoy_data, skipped_id = future.result()
+
+                if buoy_data is not None:
+                    f.write(orjson.dumps(buoy_data, option=orjson.OPT_APPEND_NEWLINE))
+                    f.flush()
+                    os.fsync(f.fileno())
+                if skipped_id is not None:
+                    skipped.write(f"{skipped_id}\n")
+                    skipped.flush()
+                    os.fsync(skipped.fileno())
 
 station_ids = get_station_ids('ndbc_list.txt')
-write_buoys_to_file(station_ids, 'buoys.json')
+write_buoys_to_file(station_ids, 'buoys.ndjson.gz')